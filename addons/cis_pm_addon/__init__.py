@@ -11,6 +11,8 @@ bl_info = {
 }
 
 import os
+import stat
+import sys
 import bpy
 from bpy.types import Panel, Operator, PropertyGroup
 from bpy.props import PointerProperty, EnumProperty, StringProperty, FloatProperty
@@ -20,50 +22,118 @@ from . import pm_adapter, cis_bodies2pm, cis_wings2pm, cis_logging
 
 
 # -------- Paths (anchored to addon root) --------
-def _get_addon_root() -> str:
-    return os.path.dirname(os.path.abspath(__file__))
-
-def _templates_dir() -> str:
-    return os.path.join(_get_addon_root(), "templates")
-
-def _vmesh_dir() -> str:
-    d = os.path.join(_get_addon_root(), "vmesh")
-    os.makedirs(d, exist_ok=True)
-    return d
-
-def _dump_path() -> str:
-    return os.path.join(_vmesh_dir(), "virtual_obj_dump.txt")
+_ADDON_ROOT = os.path.dirname(os.path.abspath(__file__))
+_TEMPLATES_DIR = os.path.join(_ADDON_ROOT, "templates")
+_VMESH_DIR = os.path.join(_ADDON_ROOT, "vmesh")
+_DUMP_PATH = os.path.join(_VMESH_DIR, "virtual_obj_dump.txt")
+_TEMPLATE_ACF_PATH = os.path.join(_TEMPLATES_DIR, "CIS_Template.acf")
+_BODY_TEMPLATE_PATH = os.path.join(_TEMPLATES_DIR, "body_block_template_zeroed.txt")
+_WING_TEMPLATE_PATH = os.path.join(_TEMPLATES_DIR, "wing_block_template_zeroed.txt")
+# keep in sync with cis_logging.log_path()
+_LOG_PATH = os.path.join(_ADDON_ROOT, "cis_pm_generator_log.txt")
+
+
+# Fixed body slots by mesh-name prefix; other meshes follow in scan order
+_BODY_PRIO = (("Fuselage", 0), ("LF_Cowling", 1), ("RT_Cowling", 2))
+
+
+# -------- File copy --------
+_FICLONE = 0x40049409  # Linux ioctl: share extents with another file (Btrfs/XFS)
+_COPY_BLOCKSIZE = 8 * 1024 * 1024
+
+
+def _kernel_copy(fsrc, fdst, blocksize: int = _COPY_BLOCKSIZE) -> bool:
+    """
+    Copy fsrc -> fdst without moving the data through Python: reflink clone,
+    else os.copy_file_range. Returns False if neither is available or the
+    copy came up short, leaving both files rewound and fdst empty.
+    """
+    in_fd, out_fd = fsrc.fileno(), fdst.fileno()
+    # FICLONE's request number is Linux-only; elsewhere it decodes to an
+    # unrelated ioctl, so don't send it on macOS/BSD
+    if sys.platform.startswith("linux"):
+        try:
+            import fcntl
+            fcntl.ioctl(out_fd, getattr(fcntl, "FICLONE", _FICLONE), in_fd)
+            return True
+        except OSError:
+            pass  # no reflink support on this filesystem
 
-def _log_path() -> str:
-    # keep in sync with cis_logging.log_path()
-    return os.path.join(_get_addon_root(), "cis_pm_generator_log.txt")
+    if hasattr(os, "copy_file_range"):
+        try:
+            size = os.fstat(in_fd).st_size
+            total = 0
+            while True:
+                n = os.copy_file_range(in_fd, out_fd, blocksize)
+                if not n:
+                    break
+                total += n
+            # Some FUSE/overlay/network mounts report 0 on a non-empty source:
+            # only trust the copy if every byte arrived
+            if total == size:
+                return True
+        except OSError:
+            pass  # e.g. cross-device on older kernels
+        # start over below
+        fsrc.seek(0)
+        fdst.seek(0)
+        fdst.truncate()
+    return False
+
+
+def _fast_copy(src: str, dst: str, size: int = 0) -> None:
+    """
+    Copy src -> dst with metadata, like shutil.copy2, but keep the copy in
+    kernel space where possible (copy-on-write clone or copy_file_range).
+    Falls back to shutil.copy2, which itself uses sendfile (Linux),
+    fcopyfile (macOS) or a large-buffer loop (Windows).
+    `size` (source size, if already stat'ed) lets copy_file_range move the
+    whole file in one call.
+    """
+    import shutil  # only needed on Generate; keep it off the add-on load path
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        copied = _kernel_copy(fsrc, fdst, max(size, _COPY_BLOCKSIZE))
+    if copied:
+        shutil.copystat(src, dst)
+    else:
+        shutil.copy2(src, dst)
+
+
+def _needs_backup(src_st: os.stat_result, dst: str) -> bool:
+    """
+    False if dst already looks like a copy2/_fast_copy of the source
+    (same size and mtime, which copystat carries over), so it can be kept.
+    """
+    try:
+        dst_st = os.stat(dst)
+    except OSError:
+        return True
+    return (src_st.st_size != dst_st.st_size) or (src_st.st_mtime_ns != dst_st.st_mtime_ns)
 
 
 # -------- Visible meshes (recursive, viewport visibility) --------
 def _cis_iter_visible_mesh_objects_recursive(collection):
-    yielded = set()
-    for obj in collection.objects:
+    # all_objects is Blender's cached, de-duplicated object list for the whole
+    # subtree (top collection first, then children depth-first).
+    for obj in collection.all_objects:
         if obj.type == "MESH" and obj.visible_get():
-            key = obj.as_pointer() if hasattr(obj, "as_pointer") else id(obj)
-            if key not in yielded:
-                yielded.add(key); yield obj
-    for child in collection.children_recursive:
-        for obj in child.objects:
-            if obj.type == "MESH" and obj.visible_get():
-                key = obj.as_pointer() if hasattr(obj, "as_pointer") else id(obj)
-                if key not in yielded:
-                    yielded.add(key); yield obj
+            yield obj
 
 
 # -------- Properties --------
+# Module-level so Blender always sees the same (stable) item strings.
+_CIS_PM_MODE_ITEMS = (
+    ("MODIFY", "Modify Existing", "Backup and overwrite an existing .acf"),
+    ("CREATE", "Create New", "Create a new .acf from template"),
+)
+
+
 class CIS_PM_Properties(PropertyGroup):
     mode: EnumProperty(
         name="Mode",
         description="Generate using Modify or Create mode",
-        items=[
-            ("MODIFY", "Modify Existing", "Backup and overwrite an existing .acf"),
-            ("CREATE", "Create New", "Create a new .acf from template"),
-        ],
+        items=_CIS_PM_MODE_ITEMS,
         default="MODIFY",
     )
 
@@ -189,7 +259,7 @@ class CIS_OT_PMClearLog(Operator):
     bl_label = "Clear Log"
 
     def execute(self, context):
-        path = _log_path()
+        path = _LOG_PATH
         try:
             with open(path, "w", encoding="utf-8") as f:
                 f.write("")
@@ -207,60 +277,97 @@ class CIS_OT_PMGenerate(Operator):
     bl_options = {"REGISTER", "UNDO"}
 
     def execute(self, context):
-        props = context.scene.cis_pm
+        # Buffer log lines and write them to disk once, after the run
+        log_buf = []
 
         def log_line(msg: str):
-            p = _log_path()
+            log_buf.append(msg)
+            print(msg)
+
+        try:
+            result = self._generate(context, log_line)
+        finally:
+            cis_logging.flush_logger()
             try:
-                cis_logging.log_line(msg)  # use module if available
+                cis_logging.log_lines(log_buf)  # use module if available
             except Exception:
                 try:  # hard fallback: write ourselves
-                    with open(p, "a", encoding="utf-8") as f:
-                        f.write(msg + "\n")
+                    with open(_LOG_PATH, "a", encoding="utf-8") as f:
+                        f.write("\n".join(log_buf) + "\n")
                 except Exception:
                     pass
-                print(msg)
 
-        # Validate collection
+        if result == {'FINISHED'}:
+            try:
+                cis_logging.open_log_in_text_editor(focus=True)
+            except Exception:
+                pass
+        return result
+
+    def _generate(self, context, log_line):
+        props = context.scene.cis_pm
+        # Read each RNA property once up front
         col = props.collection
+        mode = props.mode
+        dihed = props.dihedral_angle
+
+        # Validate collection
         if not col:
             self.report({"ERROR"}, "Select a Flight Model Collection first.")
             return {"CANCELLED"}
 
-        meshes = list(_cis_iter_visible_mesh_objects_recursive(col))
+        # One pass: collect objects and their names together. Names are
+        # normalized like the OBJ group names the bodies are keyed by.
+        meshes, names = [], []
+        for obj in _cis_iter_visible_mesh_objects_recursive(col):
+            meshes.append(obj)
+            name = cis_bodies2pm.obj_group_name(obj.name)
+            if name and name not in names:
+                names.append(name)
         if not meshes:
             self.report({"ERROR"}, "No visible mesh objects found in the selected collection tree.")
             return {"CANCELLED"}
 
-        log_line(f"[CIS_PM] Visible meshes: {len(meshes)}")
-        for m in meshes[:24]:
-            log_line(f"[CIS_PM]  - {m.name}")
+        log_line("[CIS_PM] Visible meshes: %d" % len(meshes))
+        shown = ["[CIS_PM]  - " + n for n in names[:24]]
+        if len(names) > 24:
+            shown.append("[CIS_PM]  ...(+%d more)" % (len(names) - 24))
+        log_line("\n".join(shown))
 
-        # Build & dump virtual OBJ
+        # Build virtual OBJ in memory; dump to disk only when debugging
         try:
-            lines = pm_adapter.build_virtual_obj_lines(context, col)
-            dump_path = _dump_path()
-            with open(dump_path, "w", encoding="utf-8") as f:
-                f.writelines(lines)
-            log_line(f"[CIS_PM] Virtual OBJ dumped: {dump_path} ({len(lines)} lines)")
+            lines = pm_adapter.build_virtual_obj_lines(context, col, objects=meshes)
+            if os.environ.get("CIS_PM_DEBUG_DUMP"):
+                os.makedirs(_VMESH_DIR, exist_ok=True)
+                dump_path = _DUMP_PATH
+                with open(dump_path, "wb") as f:
+                    f.write("".join(lines).encode("utf-8"))
+                log_line(f"[CIS_PM] Virtual OBJ dumped: {dump_path} ({len(lines)} lines)")
+            else:
+                log_line(f"[CIS_PM] Virtual OBJ built ({len(lines)} lines)")
         except Exception as e:
             self.report({"ERROR"}, f"Failed to build/dump virtual OBJ: {e}")
             return {"CANCELLED"}
 
-        dihed = props.dihedral_angle
-
         # Resolve ACF target
-        if props.mode == "MODIFY":
+        if mode == "MODIFY":
             acf_path = props.existing_acf_path
-            if not acf_path or not os.path.isfile(acf_path):
+            # One stat for the existence check and the copy size
+            try:
+                st = os.stat(acf_path) if acf_path else None
+            except OSError:
+                st = None
+            if st is None or not stat.S_ISREG(st.st_mode):
                 self.report({"ERROR"}, "Provide a valid path to an existing .acf file.")
                 return {"CANCELLED"}
             base, ext = os.path.splitext(acf_path)
             bak_path = f"{base}_bak{ext}"
             try:
-                import shutil
-                shutil.copy2(acf_path, bak_path)
-                log_line(f"[CIS_PM] Backup created: {bak_path}")
+                if _needs_backup(st, bak_path):
+                    _fast_copy(acf_path, bak_path, st.st_size)
+                    log_line(f"[CIS_PM] Backup created: {bak_path}")
+                else:
+                    log_line(f"[CIS_PM] Backup up to date: {bak_path}")
             except Exception as e:
                 self.report({"ERROR"}, f"Failed to create backup: {e}")
                 return {"CANCELLED"}
@@ -279,40 +386,31 @@ class CIS_OT_PMGenerate(Operator):
                 new_name += ".acf"
             os.makedirs(new_dir, exist_ok=True)
             acf_out_path = os.path.join(new_dir, new_name)
-            acf_in_path = acf_out_path
-            template_acf = os.path.join(_templates_dir(), "CIS_Template.acf")
-            if not os.path.isfile(template_acf):
+            template_acf = _TEMPLATE_ACF_PATH
+            # Checked once in register(); only re-stat if it was missing then
+            if not _TEMPLATE_EXISTS and not os.path.isfile(template_acf):
                 self.report({"ERROR"}, f"Template not found: {template_acf}")
                 return {"CANCELLED"}
-            try:
-                import shutil
-                shutil.copy2(template_acf, acf_out_path)
-                log_line(f"[CIS_PM] Created new ACF from template: {acf_out_path}")
-            except Exception as e:
-                self.report({"ERROR"}, f"Failed to create new aircraft: {e}")
-                return {"CANCELLED"}
+            # Bodies are rewritten straight from the template into the new file
+            acf_in_path = template_acf
+            log_line(f"[CIS_PM] Creating new ACF from template: {acf_out_path}")
 
         # Templates
-        body_template_path = os.path.join(_templates_dir(), "body_block_template_zeroed.txt")
-        wing_template_path = os.path.join(_templates_dir(), "wing_block_template_zeroed.txt")
+        body_template_path = _BODY_TEMPLATE_PATH
+        wing_template_path = _WING_TEMPLATE_PATH
         log_line(f"[CIS_PM] Body template: {body_template_path}")
         log_line(f"[CIS_PM] Wing template: {wing_template_path}")
 
-        # Bodies mapping from OBJ names
-        try:
-            names = cis_bodies2pm.scan_obj_mesh_names(dump_path)
-        except Exception as e:
-            self.report({"ERROR"}, f"Failed to scan OBJ groups: {e}")
-            return {"CANCELLED"}
-
-        prio = {"Fuselage": 0, "LF_Cowling": 1, "RT_Cowling": 2}
-        mesh_rows, used = [], set()
-        for key, idx in prio.items():
-            for n in names:
-                if n.startswith(key):
-                    mesh_rows.append({"mesh_name": n, "body_index": idx, "pm_name": n})
-                    used.add(n); break
-        next_idx = 3
+        # Bodies mapping from OBJ names (same as the exported mesh names)
+        # One pass over names: first match per priority prefix claims its slot
+        mesh_rows, used, found = [], set(), {}
+        for n in names:
+            for key, idx in _BODY_PRIO:
+                if idx not in found and n.startswith(key):
+                    found[idx] = n; used.add(n); break
+        for idx, n in sorted(found.items()):
+            mesh_rows.append({"mesh_name": n, "body_index": idx, "pm_name": n})
+        next_idx = len(_BODY_PRIO)
         for n in names:
             if n in used:
                 continue
@@ -322,24 +420,25 @@ class CIS_OT_PMGenerate(Operator):
 
         # Bodies: manual build to pass dihedral to cowlings
         try:
-            bodies = cis_bodies2pm.build_bodies_from_obj(dump_path)
+            bodies = cis_bodies2pm.build_bodies_from_obj_lines(lines)
             by_name = {b["group_name"]: b for b in bodies}
 
-            bodies_by_idx = {}
+            # mesh_rows is already in body_index order: walk it once and
+            # renumber the bodies that were built (bodies are fresh per run)
+            ordered = []
             for row in mesh_rows:
-                name = row["mesh_name"]; idx = row["body_index"]
-                if name in by_name and idx not in bodies_by_idx:
-                    body = dict(by_name[name])
+                body = by_name.get(row["mesh_name"])
+                if body is not None:
+                    body["body_index"] = len(ordered)
                     body["pm_name"] = row["pm_name"]
-                    bodies_by_idx[idx] = body
-
-            ordered = [bodies_by_idx[i] for i in sorted(bodies_by_idx.keys())]
+                    ordered.append(body)
 
+            body_template = cis_bodies2pm.get_template_lines(body_template_path)
             all_lines = []
-            for i, _ in enumerate(ordered):
-                ordered[i]["body_index"] = i
+            for i in range(len(ordered)):
                 blk = cis_bodies2pm.build_body_block_from_template(
-                    ordered, i, body_template_path, wing_dihed_deg=dihed
+                    ordered, i, body_template_path, wing_dihed_deg=dihed,
+                    template_lines=body_template,
                 )
                 all_lines.extend(blk)
 
@@ -351,7 +450,7 @@ class CIS_OT_PMGenerate(Operator):
 
         # --- Wings ---
         try:
-            panel_data = cis_wings2pm.compute_all_panels(dump_path, dihed, log_func=log_line)
+            panel_data = cis_wings2pm.compute_all_panels_from_lines(lines, dihed, log_func=log_line)
             log_line("[CIS_PM] Computed wing panels.")
             out_after_wings = cis_wings2pm.generate_wings_from_template_and_rewrite_acf(
                 acf_out_path, panel_data, wing_template_path, log_func=log_line
@@ -360,6 +459,8 @@ class CIS_OT_PMGenerate(Operator):
             # keep only acf_out_path
             if out_after_wings and os.path.isfile(out_after_wings) and out_after_wings != acf_out_path:
                 try:
+                    import shutil
+                    shutil.copymode(acf_out_path, out_after_wings)  # keep the ACF's mode bits
                     os.replace(out_after_wings, acf_out_path)
                     log_line(f"[CIS_PM] Consolidated updated ACF into: {acf_out_path}")
                 except Exception as e:
@@ -373,10 +474,6 @@ class CIS_OT_PMGenerate(Operator):
 
         # ✅ ALWAYS end execute with a FINISHED return
         self.report({'INFO'}, f"Done. Updated: {acf_out_path}")
-        try:
-            cis_logging.open_log_in_text_editor(focus=True)
-        except Exception:
-            pass
         return {'FINISHED'}
 
 
@@ -389,29 +486,24 @@ classes = (
     CIS_OT_PMClearLog,
     CIS_OT_PMGenerate,
 )
+_register_classes, _unregister_classes = bpy.utils.register_classes_factory(classes)
+
+# Set in register(): whether templates/CIS_Template.acf is present
+_TEMPLATE_EXISTS = False
 
 def register():
-    for cls in classes:
-        bpy.utils.register_class(cls)
+    global _TEMPLATE_EXISTS
+    _TEMPLATE_EXISTS = os.path.isfile(_TEMPLATE_ACF_PATH)
+    if not _TEMPLATE_EXISTS:
+        print(f"[CIS_PM] WARNING: template not found: {_TEMPLATE_ACF_PATH}")
+
+    _register_classes()
 
     bpy.types.Scene.cis_pm = PointerProperty(
         name="CIS PlaneMaker Settings CC",
         type=CIS_PM_Properties,
     )
 
-    # Ensure log helper operators from cis_logging (if any) are available as well
-    try:
-        cis_logging.register()
-    except Exception as e:
-        print(f"[CIS_PM] cis_logging.register() failed: {e}")
-
 def unregister():
-    # Unregister helper operators first
-    try:
-        cis_logging.unregister()
-    except Exception as e:
-        print(f"[CIS_PM] cis_logging.unregister() failed: {e}")
-
     del bpy.types.Scene.cis_pm
-    for cls in reversed(classes):
-        bpy.utils.unregister_class(cls)
+    _unregister_classes()  # reverse order
@@ -1,8 +1,11 @@
-from typing import List, Tuple, Dict, Any
+from typing import Iterable, List, Sequence, Tuple, Dict, Any
 import math
-from collections import defaultdict
 import os, sys
+import shutil
 import subprocess
+from functools import lru_cache
+
+import numpy as np
 
 
 def resource_path(relative_path: str) -> str:
@@ -23,7 +26,7 @@ BODY_TEMPLATE_PATH = os.path.join(TEMPLATE_DIR, "body_block_template_zeroed.txt"
 
 
 def compute_part_rad_from_rings(
-    rings: List[List[Tuple[float, float, float]]],
+    rings: List[np.ndarray],
     buffer_ft: float = 1.0,
 ) -> float:
     """
@@ -33,25 +36,17 @@ def compute_part_rad_from_rings(
     in x or y, so we take the max(|x|, |y|) over all vertices and add a buffer.
 
     Args:
-        rings:     rings[i][j] = (x_ft, y_ft, z_ft)
+        rings:     rings[i] is an (R,3) array, rings[i][j] = (x_ft, y_ft, z_ft)
         buffer_ft: safety margin in feet (default 1.0)
 
     Returns:
         part_rad_ft (float)
     """
-    max_x = 0.0
-    max_y = 0.0
-
-    for ring in rings:
-        for x_ft, y_ft, _ in ring:
-            ax = abs(x_ft)
-            ay = abs(y_ft)
-            if ax > max_x:
-                max_x = ax
-            if ay > max_y:
-                max_y = ay
-
-    base_rad = max(max_x, max_y)
+    # One (M,3) array over all ring points; max |x|, |y| in a single reduction
+    if not rings:
+        return buffer_ft
+    pts = np.concatenate([np.asarray(ring, dtype=np.float64).reshape(-1, 3) for ring in rings])
+    base_rad = float(np.abs(pts[:, :2]).max()) if len(pts) else 0.0
     return base_rad + buffer_ft
 
 def print_body_header_PMstyle(bodies: List[Dict[str, Any]], body_index: int) -> None:
@@ -85,62 +80,110 @@ def print_body_header_PMstyle(bodies: List[Dict[str, Any]], body_index: int) ->
 # OBJ loading (all groups with faces)
 # -------------------------------------------------
 
+def obj_group_name(raw: str) -> str:
+    """
+    Group name for an OBJ "g"/"o" line remainder, or for a Blender object name
+    exported as one: surrounding whitespace is not part of the name.
+    """
+    return raw.strip()
+
+
 def load_all_groups_with_faces(obj_path: str) -> Dict[str, Dict[str, Any]]:
     """
     Load all groups from an OBJ file.
 
+    See load_all_groups_with_faces_from_lines() for the returned structure.
+    The file is streamed line by line (single pass), not materialized.
+    """
+    with open(obj_path, "r", encoding="utf-8") as f:
+        return load_all_groups_with_faces_from_lines(f)
+
+
+def _parse_obj_vertices(v_lines: List[str]) -> np.ndarray:
+    """
+    Parse OBJ "v x y z" lines into an (N,3) float64 array with one NumPy
+    text parse instead of three float() calls per line.
+    The joined parse is only used when every line has exactly x y z, so a
+    short or long line can never shift values into the next vertex.
+    """
+    if not v_lines:
+        return np.empty((0, 3), dtype=np.float64)
+    if all(len(ln.split()) == 4 for ln in v_lines):
+        flat = np.fromstring(" ".join([ln[2:] for ln in v_lines]), dtype=np.float64, sep=" ")
+        if flat.size == 3 * len(v_lines):
+            return flat.reshape(-1, 3)
+    # Extra components (w, vertex colors): keep x y z per line
+    rows = [ln.split()[1:4] for ln in v_lines]
+    for ln, row in zip(v_lines, rows):
+        if len(row) != 3:
+            raise ValueError(f"OBJ vertex line needs x y z: {ln.strip()!r}")
+    return np.array(rows, dtype=np.float64)
+
+
+def load_all_groups_with_faces_from_lines(lines: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Load all groups from in-memory OBJ lines (e.g. pm_adapter output) or any
+    iterable of lines, such as an open file; it is consumed once.
+
     For each group we build a *local* vertex array (only vertices referenced
     by that group's faces) and remap face indices to that local array.
 
     Returns:
         groups[group_name] = {
-            "verts_m": [(x,y,z), ...],       # local verts
-            "faces":   [[v_idx0,...], ...],  # faces using 0-based local indices
+            "verts_m": ndarray (N,3) float64,  # local verts (x,y,z columns)
+            "faces":   (F,k) int32 ndarray when every face has k corners,
+                       else [[v_idx0,...], ...];  # 0-based local indices
         }
     """
-    # First pass: collect all global vertices (index = position in this list)
-    all_verts: List[Tuple[float, float, float]] = []
-    with open(obj_path, "r", encoding="utf-8") as f:
-        for line in f:
-            if line.startswith("v "):
-                _, xs, ys, zs = line.split()[:4]
-                all_verts.append((float(xs), float(ys), float(zs)))
-
-    # Second pass: for each group, collect faces as lists of *global* indices
+    # Single pass: global vertices (index = position in all_verts) and, per
+    # group, faces as lists of *global* indices. Faces are only remapped after
+    # the loop, so every referenced vertex has been read by then.
+    v_lines: List[str] = []
     groups_faces_global: Dict[str, List[List[int]]] = {}
-    current_group = None
+    current_faces = None
 
-    with open(obj_path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-
-            if line.startswith("g ") or line.startswith("o "):
-                current_group = line.split(" ", 1)[1]
-                groups_faces_global.setdefault(current_group, [])
-
-            elif line.startswith("f ") and current_group is not None:
-                parts = line.split()[1:]
-                face: List[int] = []
-                for token in parts:
-                    v_str = token.split("/")[0]
-                    vi = int(v_str) - 1  # OBJ 1-based -> 0-based
-                    face.append(vi)
-                groups_faces_global[current_group].append(face)
+    for line in lines:
+        if line[:1] in (" ", "\t"):
+            line = line.lstrip()
+        tag = line[:2]
+
+        if tag == "v ":
+            v_lines.append(line)
+
+        elif tag == "f ":
+            if current_faces is not None:
+                current_faces.append([int(t.split("/")[0]) - 1 for t in line.split()[1:]])  # OBJ 1-based -> 0-based
+
+        elif tag == "g " or tag == "o ":
+            parts = line.split(None, 1)
+            if len(parts) == 2:  # a bare "g" / "o" line names no group: skip it
+                current_group = obj_group_name(parts[1])
+                current_faces = groups_faces_global.setdefault(current_group, [])
+
+    all_verts = _parse_obj_vertices(v_lines)
 
     # Build per-group local verts and remapped faces
     groups: Dict[str, Dict[str, Any]] = {}
     for gname, faces_global in groups_faces_global.items():
-        used_global: set[int] = set()
-        for face in faces_global:
-            used_global.update(face)
-
-        used_sorted = sorted(used_global)
-        global_to_local = {gv: li for li, gv in enumerate(used_sorted)}
+        # Flatten all face references; np.unique gives the sorted used global
+        # indices and, via return_inverse, each reference's local index.
+        sizes = [len(face) for face in faces_global]
+        flat = np.fromiter(
+            (gv for face in faces_global for gv in face), dtype=np.int64, count=sum(sizes)
+        )
+        used_sorted, inverse = np.unique(flat, return_inverse=True)
 
-        local_verts = [all_verts[gv] for gv in used_sorted]
-        local_faces = [[global_to_local[gv] for gv in face] for face in faces_global]
+        local_verts = all_verts[used_sorted]  # fancy index -> contiguous copy
+        if sizes and sizes.count(sizes[0]) == len(sizes):
+            # Uniform arity (all tris / all quads): rectangular index matrix
+            local_faces = inverse.reshape(len(sizes), sizes[0]).astype(np.int32)
+        else:
+            inv = inverse.ravel().tolist()
+            local_faces = []
+            pos = 0
+            for n in sizes:
+                local_faces.append(inv[pos:pos + n])
+                pos += n
 
         groups[gname] = {
             "verts_m": local_verts,
@@ -155,59 +198,129 @@ def load_all_groups_with_faces(obj_path: str) -> Dict[str, Dict[str, Any]]:
 # Topology helpers
 # -------------------------------------------------
 
-def build_vertex_adjacency(
+def weld_vertices(
+    verts_m: "np.ndarray | List[Tuple[float, float, float]]",
+    faces: "List[List[int]] | np.ndarray",
+    eps: float,
+) -> Tuple[np.ndarray, "List[List[int]] | np.ndarray"]:
+    """
+    Merge near-coincident vertices by spatial hashing: every vertex is keyed
+    by round(pos / eps), vertices sharing a key collapse to their mean, and
+    face indices are remapped. Returns (verts_m, faces) in the input layout.
+    """
+    arr = np.asarray(verts_m, dtype=np.float64).reshape(-1, 3)
+    if len(arr) == 0:
+        return arr, faces
+    keys = np.round(arr / eps).astype(np.int64)
+    uniq, inv = np.unique(keys, axis=0, return_inverse=True)
+    inv = inv.reshape(-1)
+    if len(uniq) == len(arr):
+        return arr, faces  # nothing to weld
+
+    merged = np.zeros((len(uniq), 3), dtype=np.float64)
+    np.add.at(merged, inv, arr)
+    merged /= np.bincount(inv, minlength=len(uniq))[:, None]
+
+    if isinstance(faces, np.ndarray):
+        return merged, inv[faces].astype(np.int32)
+    remap = inv.tolist()
+    return merged, [[remap[v] for v in face] for face in faces]
+
+
+def _face_edges(faces: "List[List[int]] | np.ndarray") -> np.ndarray:
+    """
+    All directed face-boundary edges (v_i -> v_{i+1}, wrapping) as an (E,2)
+    int64 array. (F,k) arrays roll along axis 1; ragged face lists are
+    flattened and wrapped per face via start offsets.
+    """
+    if isinstance(faces, np.ndarray):
+        if faces.size == 0:
+            return np.empty((0, 2), dtype=np.int64)
+        f = faces.astype(np.int64, copy=False)
+        return np.stack((f, np.roll(f, -1, axis=1)), axis=2).reshape(-1, 2)
+
+    sizes = np.fromiter((len(face) for face in faces), dtype=np.int64, count=len(faces))
+    total = int(sizes.sum())
+    if total == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    flat = np.fromiter((v for face in faces for v in face), dtype=np.int64, count=total)
+    starts = np.repeat(np.cumsum(sizes) - sizes, sizes)
+    n = np.repeat(sizes, sizes)
+    nxt = starts + (np.arange(total) - starts + 1) % n
+    return np.stack((flat, flat[nxt]), axis=1)
+
+
+def build_vertex_adjacency_csr(
     num_verts: int,
-    faces: List[List[int]]
-) -> List[List[int]]:
+    faces: "List[List[int]] | np.ndarray"
+) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Build undirected vertex adjacency list from faces.
+    Build undirected vertex adjacency from faces in CSR form:
+    neighbors of v are indices[indptr[v]:indptr[v+1]] (sorted, unique).
     """
-    neighbors: List[set] = [set() for _ in range(num_verts)]
+    e = _face_edges(faces)
+    e = e[e[:, 0] != e[:, 1]]                    # drop degenerate edges
+    e = np.concatenate((e, e[:, ::-1]))          # undirected
+    e = np.unique(e, axis=0)                     # dedup, sorted by (v, nb)
+    counts = np.bincount(e[:, 0], minlength=num_verts)
+    indptr = np.zeros(num_verts + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, e[:, 1]
 
-    for face in faces:
-        n = len(face)
-        if n < 2:
-            continue
-        for i in range(n):
-            v0 = face[i]
-            v1 = face[(i + 1) % n]
-            if v0 == v1:
-                continue
-            neighbors[v0].add(v1)
-            neighbors[v1].add(v0)
 
-    return [list(nb) for nb in neighbors]
+def build_vertex_adjacency(
+    num_verts: int,
+    faces: "List[List[int]] | np.ndarray"
+) -> List[List[int]]:
+    """
+    Build undirected vertex adjacency list from faces
+    (list of index lists, or an (F,k) index array).
+    Vectorized via build_vertex_adjacency_csr; neighbor lists are sorted.
+    """
+    indptr, indices = build_vertex_adjacency_csr(num_verts, faces)
+    nb = indices.tolist()
+    bounds = indptr.tolist()
+    return [nb[bounds[v]:bounds[v + 1]] for v in range(num_verts)]
 
 
 def compute_topological_layers(
-    verts_m: List[Tuple[float, float, float]],
+    verts_m: "np.ndarray | List[Tuple[float, float, float]]",
     neighbors: List[List[int]]
 ):
     """
     BFS from nose (min z) to get topological distance per vertex.
-    Nose = min z, tail = max z.
+    Nose = min z, tail = max z (first occurrence on ties).
     """
-    z_values = [v[2] for v in verts_m]
-    nose = min(range(len(verts_m)), key=lambda i: z_values[i])
-    tail = max(range(len(verts_m)), key=lambda i: z_values[i])
-
-    from collections import deque
-
-    dist: Dict[int, int] = {nose: 0}
-    q = deque([nose])
-
-    while q:
-        v = q.popleft()
-        for nb in neighbors[v]:
-            if nb not in dist:
-                dist[nb] = dist[v] + 1
-                q.append(nb)
-
+    z_values = np.asarray(verts_m, dtype=np.float64)[:, 2]
+    nose = int(z_values.argmin())
+    tail = int(z_values.argmax())
+
+    # Layer-synchronous BFS over a flat depth list (no per-neighbor dict
+    # lookups). Frontiers are expanded in order, so the discovery order, and
+    # with it the insertion order of `dist`, matches a FIFO-queue BFS.
+    depth = [-1] * len(neighbors)
+    depth[nose] = 0
+    layers: List[List[int]] = [[nose]]
+    frontier = layers[0]
+    d = 0
+    while frontier:
+        d += 1
+        nxt: List[int] = []
+        for v in frontier:
+            for nb in neighbors[v]:
+                if depth[nb] < 0:
+                    depth[nb] = d
+                    nxt.append(nb)
+        if nxt:
+            layers.append(nxt)
+        frontier = nxt
+
+    dist: Dict[int, int] = {v: d for d, layer in enumerate(layers) for v in layer}
     return dist, nose, tail
 
 
 def build_station_vertex_groups(
-    verts_m: List[Tuple[float, float, float]],
+    verts_m: "np.ndarray | List[Tuple[float, float, float]]",
     neighbors: List[List[int]],
     max_stations: int = 20,
 ) -> List[List[int]]:
@@ -221,18 +334,22 @@ def build_station_vertex_groups(
     """
     dist, nose, tail = compute_topological_layers(verts_m, neighbors)
 
-    buckets: Dict[int, List[int]] = defaultdict(list)
-    for v_idx, d in dist.items():
-        buckets[d].append(v_idx)
+    # Bucket vertices by distance: one stable argsort + np.unique boundaries
+    # (keeps each bucket in BFS discovery order)
+    v_idx = np.fromiter(dist.keys(), dtype=np.int64, count=len(dist))
+    depths = np.fromiter(dist.values(), dtype=np.int64, count=len(dist))
+    order = np.argsort(depths, kind="stable")
+    d_uniq, starts = np.unique(depths[order], return_index=True)
+    d_values = d_uniq.tolist()
+    buckets: Dict[int, List[int]] = dict(
+        zip(d_values, (grp.tolist() for grp in np.split(v_idx[order], starts[1:])))
+    )
 
-    d_values = sorted(buckets.keys())
-    d_min = min(d_values)
+    d_min = d_values[0]
     assert d_min == 0
 
-    # tail = max z
-    z_values = [v[2] for v in verts_m]
-    tail_candidate = max(range(len(verts_m)), key=lambda i: z_values[i])
-    tail_d = dist[tail_candidate]
+    # tail = max z (already located by compute_topological_layers)
+    tail_d = dist[tail]
     tail_bucket = buckets[tail_d]
 
     stations: List[List[int]] = []
@@ -274,50 +391,49 @@ def build_station_vertex_groups(
 # -------------------------------------------------
 
 def build_pm_rings_for_mesh(
-    verts_m: List[Tuple[float, float, float]],
-    faces: List[List[int]],
+    verts_m: "np.ndarray | List[Tuple[float, float, float]]",
+    faces: "List[List[int]] | np.ndarray",
 ):
     """
     Topology-based detection of stations + building PM rings (j=0..17).
+    `verts_m` is an (N,3) array (or a list of (x,y,z) tuples). Each returned
+    ring is an (18,3) float64 array of (x_ft, y_ft, z_ft) rows.
     """
     num_verts = len(verts_m)
     if num_verts == 0:
         return 0.0, [], 0
 
-    # recenter x
-    xs = [v[0] for v in verts_m]
-    min_x, max_x = min(xs), max(xs)
+    # recenter x (column-wise on the whole array)
+    verts_arr = np.array(verts_m, dtype=np.float64)
+    xs = verts_arr[:, 0]
+    min_x, max_x = float(xs.min()), float(xs.max())
     center_x_m = (min_x + max_x) / 2.0
     part_x_ft = center_x_m * FT_PER_M
-    verts_local = [(x - center_x_m, y, z) for (x, y, z) in verts_m]
+    xs -= center_x_m
 
     neighbors = build_vertex_adjacency(num_verts, faces)
-    station_vertex_groups = build_station_vertex_groups(verts_local, neighbors)
+    station_vertex_groups = build_station_vertex_groups(verts_arr, neighbors)
 
-    rings: List[List[Tuple[float, float, float]]] = []
+    rings: List[np.ndarray] = []  # one (18,3) float64 array per station
     half_n_max = 0
     eps = 1e-5
+    j_left = np.arange(9)
 
     for station in station_vertex_groups:
         # tip / tail
         if len(station) == 1:
-            idx = station[0]
-            x_m, y_m, z_m = verts_local[idx]
-            y_ft = y_m * FT_PER_M
-            z_ft = z_m * FT_PER_M
-            if abs(y_ft) < eps:
-                y_ft = 0.0
-            if abs(z_ft) < eps:
-                z_ft = 0.0
-            rings.append([(0.0, y_ft, z_ft)] * 18)
+            tip = verts_arr[station[0]] * FT_PER_M
+            tip[0] = 0.0
+            tip[np.abs(tip) < eps] = 0.0
+            rings.append(np.tile(tip, (18, 1)))
             continue
 
-        # mid ring
-        station_verts_m = [verts_local[idx] for idx in station]
+        # mid ring: station verts in station order, +x half only
+        station_verts_m = verts_arr[station]
 
         eps_split = 1e-5
-        half_raw = [v for v in station_verts_m if v[0] >= -eps_split]
-        n_half = len(half_raw)
+        half_ft = station_verts_m[station_verts_m[:, 0] >= -eps_split] * FT_PER_M
+        n_half = len(half_ft)
         if not (5 <= n_half <= 9):
             raise ValueError(
                 f"Station with {len(station_verts_m)} verts produced "
@@ -326,70 +442,36 @@ def build_pm_rings_for_mesh(
         if n_half > half_n_max:
             half_n_max = n_half
 
-        half_ft = []
-        for (x_m, y_m, z_m) in half_raw:
-            half_ft.append([x_m * FT_PER_M, y_m * FT_PER_M, z_m * FT_PER_M])
-
         eps_center = 1e-4
-        center_indices = [
-            i for i, (x_ft, y_ft, z_ft) in enumerate(half_ft)
-            if abs(x_ft) < eps_center
-        ]
+        center_indices = np.flatnonzero(np.abs(half_ft[:, 0]) < eps_center)
 
         if len(center_indices) >= 2:
-            cl = [(i, half_ft[i][1]) for i in center_indices]
-            top_i = max(cl, key=lambda t: t[1])[0]
-            bot_i = min(cl, key=lambda t: t[1])[0]
-            top = half_ft[top_i]
-            bottom = half_ft[bot_i]
-            side = [half_ft[i] for i in range(len(half_ft)) if i not in {top_i, bot_i}]
-
-            side_with_angle = []
-            for x_ft, y_ft, z_ft in side:
-                ang = math.atan2(y_ft, x_ft if abs(x_ft) > 1e-12 else 0.0)
-                side_with_angle.append((x_ft, y_ft, z_ft, ang))
-            side_with_angle.sort(key=lambda t: t[3], reverse=True)
-
-            ordered = [top] + [
-                [x_ft, y_ft, z_ft] for (x_ft, y_ft, z_ft, _) in side_with_angle
-            ] + [bottom]
+            # first max / min y among the centerline verts
+            center_y = half_ft[center_indices, 1]
+            top_i = center_indices[np.argmax(center_y)]
+            bot_i = center_indices[np.argmin(center_y)]
+            side_idx = np.setdiff1d(np.arange(n_half), (top_i, bot_i))
         else:
-            side_with_angle = []
-            for x_ft, y_ft, z_ft in half_ft:
-                ang = math.atan2(y_ft, x_ft if abs(x_ft) > 1e-12 else 0.0)
-                side_with_angle.append((x_ft, y_ft, z_ft, ang))
-            side_with_angle.sort(key=lambda t: t[3], reverse=True)
-            ordered = [[x_ft, y_ft, z_ft] for (x_ft, y_ft, z_ft, _) in side_with_angle]
-
-        left_ring: List[Tuple[float, float, float]] = []
-        for j in range(9):
-            if j < len(ordered):
-                x_ft, y_ft, z_ft = ordered[j]
-            else:
-                x_ft, y_ft, z_ft = ordered[-1]
+            side_idx = np.arange(n_half)
 
-            #x_ft = -x_ft
+        # side verts by angle, descending; stable, so ties keep station order
+        side = half_ft[side_idx]
+        ang = np.arctan2(side[:, 1], np.where(np.abs(side[:, 0]) > 1e-12, side[:, 0], 0.0))
+        side = side[np.argsort(-ang, kind="stable")]
 
-            #print(f'X axis value {x_ft}')
-
-            if abs(x_ft) < eps:
-                x_ft = 0.0
-            if abs(y_ft) < eps:
-                y_ft = 0.0
-            if abs(z_ft) < eps:
-                z_ft = 0.0
-            left_ring.append((x_ft, y_ft, z_ft))
+        if len(center_indices) >= 2:
+            ordered = np.vstack((half_ft[top_i], side, half_ft[bot_i]))
+        else:
+            ordered = side
 
-        ring: List[Tuple[float, float, float]] = [None] * 18
-        for j_left in range(9):
-            x_left, y_left, z_left = left_ring[j_left]
-            ring[j_left] = (x_left, y_left, z_left)
-            x_right = -x_left
-            if abs(x_right) < eps:
-                x_right = 0.0
-            ring[9 + j_left] = (x_right, y_left, z_left)
+        # j = 0..8 (repeat the last point if short), then mirror to j = 9..17
+        left_ring = ordered[np.minimum(j_left, len(ordered) - 1)]
+        left_ring[np.abs(left_ring) < eps] = 0.0
+        right_ring = left_ring.copy()
+        right_ring[:, 0] = -right_ring[:, 0]
+        right_ring[np.abs(right_ring[:, 0]) < eps, 0] = 0.0
 
-        rings.append(ring)
+        rings.append(np.vstack((left_ring, right_ring)))
 
     return part_x_ft, rings, half_n_max
 
@@ -398,12 +480,27 @@ def build_pm_rings_for_mesh(
 # Build bodies from OBJ using new method
 # -------------------------------------------------
 
-def build_bodies_from_obj(obj_path: str) -> List[Dict[str, Any]]:
+def build_bodies_from_obj(obj_path: str, weld_eps: float | None = None) -> List[Dict[str, Any]]:
     """
     Build all bodies from an OBJ file using topology-based rings.
     Each body: { body_index, group_name, part_x_ft, rings, half_n_max }
+    If weld_eps is set, near-coincident vertices (within ~weld_eps metres) are
+    merged per group before adjacency/BFS (see weld_vertices).
+    """
+    return _build_bodies_from_groups(load_all_groups_with_faces(obj_path), weld_eps)
+
+
+def build_bodies_from_obj_lines(lines: List[str], weld_eps: float | None = None) -> List[Dict[str, Any]]:
     """
-    groups = load_all_groups_with_faces(obj_path)
+    Same as build_bodies_from_obj(), but from in-memory OBJ lines.
+    """
+    return _build_bodies_from_groups(load_all_groups_with_faces_from_lines(lines), weld_eps)
+
+
+def _build_bodies_from_groups(
+    groups: Dict[str, Dict[str, Any]],
+    weld_eps: float | None = None,
+) -> List[Dict[str, Any]]:
 
     # Optional: lock specific mapping order if desired
     order = []
@@ -431,7 +528,7 @@ def build_bodies_from_obj(obj_path: str) -> List[Dict[str, Any]]:
 
         # Skip groups that clearly are NOT valid bodies
         # Design rule: a true body must have at least 10 verts.
-        if not faces:
+        if len(faces) == 0:
             # No faces, nothing to process
             continue
 
@@ -441,6 +538,9 @@ def build_bodies_from_obj(obj_path: str) -> List[Dict[str, Any]]:
                   f"(only {len(verts_m)} verts).")
             continue
 
+        if weld_eps:
+            verts_m, faces = weld_vertices(verts_m, faces, weld_eps)
+
         # Normal body processing
         part_x_ft, rings, half_n_max = build_pm_rings_for_mesh(verts_m, faces)
         if not rings:
@@ -494,16 +594,16 @@ def build_body_block_lines(
     r_dim = 2 * half_n_max  # number of points per full ring
     s_dim = len(rings)  # number of stations
 
-    lines: List[str] = []
-
     # --- Header block ---
-    lines.append(f"P _body/{b}/_part_x {part_x_ft:.9f}")
-    lines.append(f"P _body/{b}/_part_y 0.000000000")
-    lines.append(f"P _body/{b}/_part_z 0.000000000")
-    lines.append(f"P _body/{b}/_part_rad {part_rad_ft:.9f}")
-    lines.append(f"P _body/{b}/_r_dim {r_dim:d}")
-    lines.append(f"P _body/{b}/_s_dim {s_dim:d}")
-    lines.append("")  # blank line for readability
+    header = [
+        f"P _body/{b}/_part_x {part_x_ft:.9f}",
+        f"P _body/{b}/_part_y 0.000000000",
+        f"P _body/{b}/_part_z 0.000000000",
+        f"P _body/{b}/_part_rad {part_rad_ft:.9f}",
+        f"P _body/{b}/_r_dim {r_dim:d}",
+        f"P _body/{b}/_s_dim {s_dim:d}",
+        "",  # blank line for readability
+    ]
 
     # --- Prepare padded rings grid for geo ---
     padded: List[List[Tuple[float, float, float]]] = []
@@ -523,14 +623,21 @@ def build_body_block_lines(
     i_order = _pm_i_print_order(total_stations)
     j_order = _pm_j_print_order(points_per_ring)
 
+    # Final size is known up front: header + 3 lines per (i, j)
+    n_lines = len(header) + 3 * len(i_order) * len(j_order)
+    lines: List[str] = [None] * n_lines
+    lines[:len(header)] = header
+    k = len(header)
+
     # --- _geo_xyz block in PM order ---
     for i in i_order:
         ring = padded[i]
         for j in j_order:
             x_ft, y_ft, z_ft = ring[j]
-            lines.append(f"P _body/{b}/_geo_xyz/{i},{j},0 {x_ft:.9f}")
-            lines.append(f"P _body/{b}/_geo_xyz/{i},{j},1 {y_ft:.9f}")
-            lines.append(f"P _body/{b}/_geo_xyz/{i},{j},2 {z_ft:.9f}")
+            lines[k] = f"P _body/{b}/_geo_xyz/{i},{j},0 {x_ft:.9f}"
+            lines[k + 1] = f"P _body/{b}/_geo_xyz/{i},{j},1 {y_ft:.9f}"
+            lines[k + 2] = f"P _body/{b}/_geo_xyz/{i},{j},2 {z_ft:.9f}"
+            k += 3
 
     return lines
 
@@ -539,14 +646,21 @@ def scan_obj_mesh_names(obj_path: str) -> List[str]:
     Scan the OBJ file and return a list of group/object names
     (meshes) in the order they appear.
     """
-    names: List[str] = []
     with open(obj_path, "r", encoding="utf-8", errors="ignore") as f:
-        for line in f:
-            line = line.strip()
-            if line.startswith("g ") or line.startswith("o "):
-                name = line.split(maxsplit=1)[1].strip()
-                if name and name not in names:
-                    names.append(name)
+        return scan_obj_mesh_names_from_lines(f)
+
+
+def scan_obj_mesh_names_from_lines(lines: Iterable[str]) -> List[str]:
+    """
+    Same as scan_obj_mesh_names(), but from in-memory OBJ lines.
+    """
+    names: List[str] = []
+    for line in lines:
+        line = line.strip()
+        if line.startswith("g ") or line.startswith("o "):
+            name = obj_group_name(line.split(maxsplit=1)[1])
+            if name and name not in names:
+                names.append(name)
     return names
 
 
@@ -697,7 +811,9 @@ def print_station_PMstyle(bodies: List[Dict[str, Any]], body_index: int, station
         print(f"P _body/{body_index}/_geo_xyz/{station_i},{j},2 {z_ft:.9f}")
 
 
-def _pm_i_print_order(total_stations: int = 20) -> List[int]:
+@lru_cache(maxsize=16)
+def _pm_i_print_order(total_stations: int = 20) -> Tuple[int, ...]:
+    """PM print order for total_stations; cached, returned as an immutable tuple."""
     order = []
     if total_stations > 0:
         order.append(0)
@@ -708,10 +824,12 @@ def _pm_i_print_order(total_stations: int = 20) -> List[int]:
     for i in range(2, 10):
         if i < total_stations and i not in order:
             order.append(i)
-    return order
+    return tuple(order)
 
 
-def _pm_j_print_order(points_per_ring: int = 18) -> List[int]:
+@lru_cache(maxsize=16)
+def _pm_j_print_order(points_per_ring: int = 18) -> Tuple[int, ...]:
+    """PM print order for points_per_ring; cached, returned as an immutable tuple."""
     order = []
     if points_per_ring > 0:
         order.append(0)
@@ -722,7 +840,7 @@ def _pm_j_print_order(points_per_ring: int = 18) -> List[int]:
     for j in range(2, 10):
         if j < points_per_ring and j not in order:
             order.append(j)
-    return order
+    return tuple(order)
 
 
 def print_body_geo_PMstyle_ordered(
@@ -856,11 +974,88 @@ GEO_RE = re.compile(
     r"^P _body/[^/]+/_geo_xyz/(\d+),(\d+),(\d+)\s+(-?\d+\.\d+)$"
 )
 
+
+@lru_cache(maxsize=8)
+def _load_template(path: str, mtime: float) -> Tuple[str, ...]:
+    with open(path, "r", encoding="utf-8") as f:
+        return tuple(ln.rstrip("\n") for ln in f)
+
+
+def get_template_lines(path: str) -> Tuple[str, ...]:
+    """
+    Return the lines of a template file, cached per (path, mtime) so the
+    template is only re-read from disk after it changes.
+    """
+    return _load_template(path, os.path.getmtime(path))
+
+
+_TPL_GEO, _TPL_HEADER, _TPL_BODY, _TPL_RAW = range(4)
+
+# Header params we control, in the order they are tested against a template line
+_TPL_HEADER_KEYS = (
+    "_part_x", "_part_y", "_part_z", "_part_rad", "_part_phi",
+    "_r_dim", "_s_dim", "_descrip",
+)
+
+
+@lru_cache(maxsize=8)
+def _template_plan(template_lines: Tuple[str, ...]):
+    """
+    Parse a zeroed body template once into a per-line fill plan:
+        (total_stations, points_per_ring, plan, geo_idx)
+    plan[n] = (kind, payload) for template line n:
+        _TPL_GEO    -> (i, "i,j,k", "i,j,k 0.000000000") (value from the padded grid;
+                       the preformatted zero tail is used for padding stations)
+        _TPL_HEADER -> param name in _TPL_HEADER_KEYS
+        _TPL_BODY   -> stripped line split on "_body/b/"
+        _TPL_RAW    -> line preserved as-is
+    geo_idx is the (i, j, k) fancy index of every geo line, in order.
+    """
+    max_i = 0
+    max_j = 0
+    plan = []
+    gi: List[int] = []
+    gj: List[int] = []
+    gk: List[int] = []
+
+    for line in template_lines:
+        stripped = line.strip()
+
+        m = GEO_RE.match(stripped)
+        if m:
+            i, j, k = int(m.group(1)), int(m.group(2)), int(m.group(3))
+            if GEO_RE.match(line):  # grid size is inferred from unstripped lines
+                max_i = max(max_i, i)
+                max_j = max(max_j, j)
+            gi.append(i); gj.append(j); gk.append(k)
+            key = f"{i},{j},{k}"
+            plan.append((_TPL_GEO, (i, key, key + " 0.000000000")))
+            continue
+
+        for key in _TPL_HEADER_KEYS:
+            if stripped.startswith("P _body/b/" + key):
+                plan.append((_TPL_HEADER, key))
+                break
+        else:
+            if "_body/b/" in stripped:
+                plan.append((_TPL_BODY, tuple(stripped.split("_body/b/"))))
+            else:
+                plan.append((_TPL_RAW, line))
+
+    geo_idx = (
+        np.array(gi, dtype=np.intp),
+        np.array(gj, dtype=np.intp),
+        np.array(gk, dtype=np.intp),
+    )
+    return max_i + 1, max_j + 1, tuple(plan), geo_idx
+
+
 def build_body_block_from_template(
     bodies: List[Dict[str, Any]],
     body_index: int,
     template_path: str = BODY_TEMPLATE_PATH,
     wing_dihed_deg: float = 0.0,   # NEW, default keeps old behavior
+    template_lines: Sequence[str] | None = None,
 ) -> List[str]:
 
     """
@@ -868,6 +1063,7 @@ def build_body_block_from_template(
     (with '_body/b/...') and filling it with our parameters + geo_xyz values.
 
     The output is a 1:1 clone of the template's line structure and order.
+    Pass `template_lines` (see get_template_lines) to skip loading the template.
     """
     body = bodies[body_index]
     part_x_ft = body["part_x_ft"]
@@ -891,103 +1087,61 @@ def build_body_block_from_template(
 
 
     # --- Load template lines ---
-    with open(template_path, "r", encoding="utf-8") as f:
-        template_lines = [ln.rstrip("\n") for ln in f]
-
-    # --- Infer stations / j dimension from template geo lines ---
-    max_i = 0
-    max_j = 0
-    for line in template_lines:
-        m = GEO_RE.match(line)
-        if not m:
-            continue
-        i = int(m.group(1))
-        j = int(m.group(2))
-        if i > max_i:
-            max_i = i
-        if j > max_j:
-            max_j = j
-
-    total_stations = max_i + 1
-    points_per_ring = max_j + 1
-
-    # --- Pad our rings to that grid ---
-    padded: List[List[Tuple[float, float, float]]] = []
+    if template_lines is None:
+        template_lines = get_template_lines(template_path)
+    total_stations, points_per_ring, plan, geo_idx = _template_plan(tuple(template_lines))
 
-    for i in range(min(len(rings), total_stations)):
-        ring = list(rings[i])
-        if len(ring) < points_per_ring:
-            ring += [(0.0, 0.0, 0.0)] * (points_per_ring - len(ring))
-        padded.append(ring)
+    # --- Pad our rings to that grid (zeros beyond our rings / ring length) ---
+    n_real = min(len(rings), total_stations)  # stations >= n_real are all-zero padding
+    padded = np.zeros((total_stations, points_per_ring, 3), dtype=np.float64)
+    for i, ring in enumerate(rings[:total_stations]):
+        ring = ring[:points_per_ring]
+        if len(ring):
+            padded[i, :len(ring)] = ring
 
-    for i in range(len(padded), total_stations):
-        padded.append([(0.0, 0.0, 0.0)] * points_per_ring)
+    # All geo values in template order with one gather
+    geo_vals = padded[geo_idx].tolist()
 
     # --- Dimension parameters from our geometry ---
     r_dim = 2 * half_n_max        # number of points per full ring
     s_dim = len(rings)            # number of stations
 
+    header = {
+        "_part_x": f"{part_x_ft:.9f}",
+        "_part_y": "0.000000000",
+        "_part_z": "0.000000000",
+        "_part_rad": f"{part_rad_ft:.9f}",
+        "_part_phi": f"{phi_deg:.9f}",   # NEW: tilt cowlings by wing dihedral; others stay 0
+        "_r_dim": f"{r_dim:d}",
+        "_s_dim": f"{s_dim:d}",
+        "_descrip": f"{pm_name}",
+    }
+
+    body_tag = f"_body/{b}/"
+    geo_head = f"P _body/{b}/_geo_xyz/"
     out_lines: List[str] = []
-
-    for line in template_lines:
-        stripped = line.strip()
-
-        # 1) geo_xyz lines: replace with our coordinates
-        m = GEO_RE.match(stripped)
-        if m:
-            i = int(m.group(1))
-            j = int(m.group(2))
-            k = int(m.group(3))
-
-            x_ft, y_ft, z_ft = padded[i][j]
-            if k == 0:
-                val = x_ft
-            elif k == 1:
-                val = y_ft
+    append = out_lines.append
+    g = 0
+
+    for kind, payload in plan:
+        if kind == _TPL_GEO:
+            # 1) geo_xyz lines: replace with our coordinates; padding
+            #    stations use the preformatted zero line (no float formatting)
+            i, key, zero_tail = payload
+            if i >= n_real:
+                append(geo_head + zero_tail)
             else:
-                val = z_ft
-
-            out_lines.append(
-                f"P _body/{b}/_geo_xyz/{i},{j},{k} {val:.9f}"
-            )
-            continue
-
-        # 2) header params we control
-        if stripped.startswith("P _body/b/_part_x"):
-            out_lines.append(f"P _body/{b}/_part_x {part_x_ft:.9f}")
-            continue
-        if stripped.startswith("P _body/b/_part_y"):
-            out_lines.append(f"P _body/{b}/_part_y 0.000000000")
-            continue
-        if stripped.startswith("P _body/b/_part_z"):
-            out_lines.append(f"P _body/{b}/_part_z 0.000000000")
-            continue
-        if stripped.startswith("P _body/b/_part_rad"):
-            out_lines.append(f"P _body/{b}/_part_rad {part_rad_ft:.9f}")
-            continue
-        if stripped.startswith("P _body/b/_part_phi"):
-            # NEW: tilt cowlings by wing dihedral; others stay 0
-            out_lines.append(f"P _body/{b}/_part_phi {phi_deg:.9f}")
-            continue
-        if stripped.startswith("P _body/b/_r_dim"):
-            out_lines.append(f"P _body/{b}/_r_dim {r_dim:d}")
-            continue
-        if stripped.startswith("P _body/b/_s_dim"):
-            out_lines.append(f"P _body/{b}/_s_dim {s_dim:d}")
-            continue
-        if stripped.startswith("P _body/b/_descrip"):
-            out_lines.append(f"P _body/{b}/_descrip {pm_name}")
-            continue
-
-        # 3) Any other _body/b line: just swap /b/ -> /<index>/, keep value
-        if "_body/b/" in stripped:
-            out_lines.append(
-                stripped.replace("_body/b/", f"_body/{b}/")
-            )
-            continue
-
-        # 4) Non-body lines or blanks: preserve as-is
-        out_lines.append(line)
+                append(f"{geo_head}{key} {geo_vals[g]:.9f}")
+            g += 1
+        elif kind == _TPL_HEADER:
+            # 2) header params we control
+            append(f"P {body_tag}{payload} {header[payload]}")
+        elif kind == _TPL_BODY:
+            # 3) Any other _body/b line: just swap /b/ -> /<index>/, keep value
+            append(body_tag.join(payload))
+        else:
+            # 4) Non-body lines or blanks: preserve as-is
+            append(payload)
 
     return out_lines
 
@@ -1000,6 +1154,10 @@ def rewrite_acf_bodies(
     Read an existing .acf, strip all P _body lines between PROPERTIES_BEGIN
     and PROPERTIES_END, and reinsert our new full body block at the same
     position where the old block started.
+
+    The result is written to a temp file and atomically moved to acf_out_path.
+    An existing acf_out_path must be writable, and its permission bits are
+    carried over to the replacement.
     """
     with open(acf_in_path, "r", encoding="utf-8") as f:
         lines = [ln.rstrip("\n") for ln in f]
@@ -1031,14 +1189,36 @@ def rewrite_acf_bodies(
         body_start = prop_begin + 1
         body_end = body_start - 1  # so slice is empty
 
-    # Build new lines: everything before body_start, then our bodies, then the rest
-    new_lines: List[str] = []
-    new_lines.extend(lines[:body_start])
-    new_lines.extend(new_body_lines)
-    new_lines.extend(lines[body_end + 1:])
-
-    with open(acf_out_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(new_lines))
+    # Write everything before body_start, then our bodies, then the rest,
+    # segment by segment into one large buffer (same bytes as joining the
+    # three parts, without building the merged list and its joined copy).
+    # Write next to the target and swap it in, so acf_in_path may equal
+    # acf_out_path and a failed write never leaves a truncated .acf behind.
+    # os.replace would swap in a new file regardless: refuse a read-only
+    # target, as open(acf_out_path, "w") did
+    out_exists = os.path.exists(acf_out_path)
+    if out_exists and not os.access(acf_out_path, os.W_OK):
+        raise PermissionError(f"ACF is not writable: {acf_out_path}")
+    tmp_path = acf_out_path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8", buffering=1 << 20) as f:
+            sep = ""
+            for segment in (lines[:body_start], new_body_lines, lines[body_end + 1:]):
+                if not segment:
+                    continue
+                f.write(sep)
+                f.write("\n".join(segment))
+                sep = "\n"
+        if out_exists:
+            shutil.copymode(acf_out_path, tmp_path)  # keep the ACF's mode bits
+        os.replace(tmp_path, acf_out_path)
+    except BaseException:
+        # don't leave a partial <acf>.tmp next to the aircraft
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
 
 
 def write_body_block_from_template_to_file(
@@ -15,6 +15,18 @@ Conventions
 - Units in API: accept "m" or "ft"; **convert to Blender meters** accounting for the scene unit setup.
 - Triangulation is handled by the virtual-OBJ adapter; do not triangulate here.
 - Logging: call the provided `log_fn` only; do not import the logger directly.
+- Mesh construction: **no `bpy.ops` primitive operators** (each one triggers a scene
+  update). Build vertex / face arrays in NumPy (`float32` coords, `int32` indices,
+  matching Blender's internal types so `foreach_set` is a straight copy) and assign:
+    mesh.vertices.add(n);  mesh.vertices.foreach_set("co", co.ravel())
+    mesh.loops.add(m);     mesh.loops.foreach_set("vertex_index", loop_vi)
+    mesh.polygons.add(p);  mesh.polygons.foreach_set("loop_start", ...)
+                           mesh.polygons.foreach_set("loop_total", ...)
+    mesh.update()
+  `mesh.from_pydata(...)` is an acceptable fallback only.
+- No Edit Mode round-trips / `bpy.ops.transform.*`: scales and rotations are baked
+  into the NumPy vertex array before `foreach_set`; object placement is set by direct
+  assignment to `obj.location` / `obj.rotation_euler`.
 
 Collections (required)
 ----------------------
@@ -31,10 +43,11 @@ FlightModel (root)
 Geometry stubs in this file
 ---------------------------
 - Fuselage (Bodies): cylinder, 16 verts, cap fill: triangle fan
-- Wings (Wings): three planes — Wing1, Horiz_Stab, Vert_Stab
-  - Wing1: plane size = wingspan; after creation, Edit Mode: scale X by 0.5
+- Wings (Wings): **one** mesh object holding three planes — Wing1, Horiz_Stab, Vert_Stab —
+  each tagged by a vertex group of the same name (one object instead of three)
+  - Wing1: plane size = wingspan, X scaled by 0.5 (baked into the vertex data)
   - Horiz_Stab: same process as Wing1
-  - Vert_Stab: same as Wing1 but after X-scale 0.5, rotate Y +90°
+  - Vert_Stab: same as Wing1 but after X-scale 0.5, rotate Y +90° (also baked)
 - Landing gear: **placeholder only** (API defined, no geometry yet)
 
 IMPORTANT: This is a stub module. All public functions raise NotImplementedError.
@@ -252,10 +265,14 @@ def create_fuselage_cylinder(
     - Cylinder with `segments` sides, end caps set to **triangle fan**.
     - Dimensions use `units` ("m" or "ft"); convert to Blender meters via
       `convert_user_length_to_blender_meters(...)` (respecting scene unit scale).
-    - After creation:
-        1) Enter Edit Mode, select all vertices
-        2) Apply rotation about **X axis** by **-90 degrees**
-        3) Return to Object Mode
+    - Geometry is generated analytically (see "Mesh construction" above):
+        theta = np.linspace(0, 2*pi, segments, endpoint=False, dtype=np.float32)
+        two rings (radius*cos, ±depth/2, radius*sin) + 2 cap centers -> (2*segments+2, 3) float32
+        `segments` side quads + 2*`segments` cap triangles as an int32 loop-index array
+      then assigned with `foreach_set` on a new Mesh linked into `target_collection`.
+    - The rings are stacked along **Y** (cos/sin in X/Z), i.e. the cylinder is generated
+      already in the orientation of a primitive cylinder rotated -90° about X, so no
+      Edit Mode rotation is needed afterwards.
 
     Parameters
     ----------
@@ -304,23 +321,29 @@ def create_wing_planes(
     log_fn: Callable[[str], None] = lambda msg: None,
 ) -> Dict[str, bpy.types.Object]:
     """
-    Create three plane placeholders (Wing1, Horiz_Stab, Vert_Stab) in `target_collection` (expected: **Wings**).
+    Create the three plane placeholders (Wing1, Horiz_Stab, Vert_Stab) as **one merged mesh
+    object** in `target_collection` (expected: **Wings**).
 
     Specification (to implement):
     - All inputs provided in `units` ("m" or "ft"). Use
       `convert_user_length_to_blender_meters(...)` for sizes and offsets.
-    - Planes are created one after another using **Add → Mesh → Plane**:
+    - One `(12, 3) float32` vertex array (4 verts per plane, rows 0..3 / 4..7 / 8..11 in
+      `names` order) + three quads, assigned with `foreach_set` on a single Mesh
+      (see "Mesh construction" above; no **Add → Mesh → Plane** operator).
+    - One vertex group per plane, named after `names`, holding that plane's 4 verts.
+    - Per-plane offsets are baked into the vertex rows (the planes share one object
+      transform):
       1) Wing1
          - Build: plane `size` = wingspan (converted to Blender meters)
-         - Align=World; Location X = -wingspan/2 (converted)
-         - After creation: Edit Mode → select all → scale X by **0.5** → back to Object Mode
+         - Align=World; X offset = -wingspan/2 (converted), baked into the rows
+         - X scale 0.5 baked into the verts: `co[:, 0] *= 0.5`
       2) Horiz_Stab
          - Build: same as Wing1 (size = wingspan, X offset = -wingspan/2)
-         - After creation: Edit Mode → scale X by **0.5**
+         - X scale 0.5 baked into the verts: `co[:, 0] *= 0.5`
       3) Vert_Stab
          - Build: same as Wing1 (unless `vert_stab_span` is provided; then use it)
-         - After creation: Edit Mode → scale X by **0.5**, then **rotate Y +90°**
-           (back to Object Mode)
+         - X scale 0.5, then **rotate Y +90°**, both baked into the verts:
+           `co[:, 0] *= 0.5; co = co @ R_y90.T` (R_y90 as a 3×3 float32 matrix)
 
     Parameters
     ----------
@@ -341,7 +364,9 @@ def create_wing_planes(
     Returns
     -------
     Dict[str, bpy.types.Object]
-        Mapping {"Wing1": obj, "Horiz_Stab": obj, "Vert_Stab": obj}.
+        Mapping {"Wing1": obj, "Horiz_Stab": obj, "Vert_Stab": obj}; all three values are
+        the same merged object. The part is addressed through
+        `obj.vertex_groups[name]` (its `.index` is the vertex-group index).
 
     Raises
     ------
@@ -352,6 +377,9 @@ def create_wing_planes(
     -----
     - Keep transforms minimal; no parenting/constraints here.
     - Do not triangulate; OBJ adapter handles triangulation later.
+    - The wing pipeline reads one OBJ group per surface (`o Wing1`, ...). Before this is
+      implemented, the virtual-OBJ adapter must emit one `o` group per vertex group for
+      merged objects; otherwise the three planes would reach cis_wings2pm as one surface.
     """
     raise NotImplementedError("stub")
 
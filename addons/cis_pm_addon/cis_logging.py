@@ -1,25 +1,32 @@
 # cis_pm_addon/cis_logging.py
 
 import logging
+import logging.handlers
 import os
-import traceback
 import bpy
 from bpy.types import Operator
 
 LOG_FILENAME = "cis_pm_generator_log.txt"
 LOGGER_NAME = "cis_pm_generator"
 
+# Resolved once at import; the add-on folder does not move while loaded.
+_ADDON_ROOT = os.path.dirname(os.path.abspath(__file__))
+_LOG_PATH = os.path.join(_ADDON_ROOT, LOG_FILENAME)
+
+# (mtime_ns, size) of the log file when it was last loaded into the Text Editor
+_LAST_LOG_STAT = None
+
 def _addon_root() -> str:
-    return os.path.dirname(os.path.abspath(__file__))
+    return _ADDON_ROOT
 
 def log_path() -> str:
-    return os.path.join(_addon_root(), "cis_pm_generator_log.txt")
+    return _LOG_PATH
 
 # ---- text-editor helpers ----
 def _refresh_text_block_if_loaded() -> None:
     """If the log is loaded in bpy.data.texts, refresh its content from disk."""
-    p = log_path()
-    name = os.path.basename(p)
+    p = _LOG_PATH
+    name = LOG_FILENAME
     txt = bpy.data.texts.get(name)
     if not txt:
         return
@@ -36,8 +43,8 @@ def open_log_in_text_editor(focus: bool = True):
     Ensure the log file is loaded as a Text datablock and (optionally) shown in a Text Editor area.
     Returns the bpy.types.Text instance.
     """
-    p = log_path()
-    name = os.path.basename(p)
+    p = _LOG_PATH
+    name = LOG_FILENAME
 
     # Ensure file exists
     if not os.path.exists(p):
@@ -76,7 +83,7 @@ def open_log_in_text_editor(focus: bool = True):
 # ---- logging API ----
 def log_line(msg: str) -> None:
     """Append a line to the log file, print, and refresh any loaded Text datablock."""
-    p = log_path()
+    p = _LOG_PATH
     try:
         with open(p, "a", encoding="utf-8") as f:
             f.write(f"{msg}\n")
@@ -87,22 +94,37 @@ def log_line(msg: str) -> None:
     print(msg)
     _refresh_text_block_if_loaded()
 
+def log_lines(msgs) -> None:
+    """Append several lines to the log file in one write, then refresh any loaded Text datablock once."""
+    if not msgs:
+        return
+    p = _LOG_PATH
+    try:
+        with open(p, "a", encoding="utf-8") as f:
+            f.write("\n".join(msgs) + "\n")
+    except Exception:
+        return
+    _refresh_text_block_if_loaded()
+
 # (your existing cis_logging operators/registration can remain unchanged)
 
 def get_addon_root() -> str:
     """Return the folder where this add-on (cis_pm_addon) lives."""
-    return os.path.dirname(__file__)
+    return _ADDON_ROOT
 
 
 def get_log_path() -> str:
     """Absolute path to the cis_pm_generator_log.txt file."""
-    return os.path.join(get_addon_root(), LOG_FILENAME)
+    return _LOG_PATH
 
 
 def setup_logger() -> logging.Logger:
     """
     Configure and return the shared logger.
     - Writes to cis_pm_generator_log.txt (overwritten each run).
+    - Records are buffered and written in blocks, not one write per record:
+      on ERROR, when the buffer fills, on flush_logger() (called at the end
+      of each Generate), or at interpreter exit via logging.shutdown.
     - Safe to call multiple times.
     """
     logger = logging.getLogger(LOGGER_NAME)
@@ -111,58 +133,99 @@ def setup_logger() -> logging.Logger:
         return logger  # already configured
 
     logger.setLevel(logging.DEBUG)
+    invalidate_log_cache()  # log file is truncated below
 
-    # File handler
-    fh = logging.FileHandler(get_log_path(), mode="w", encoding="utf-8")
+    # File handler behind a memory buffer: FileHandler flushes after every
+    # record, so batch records instead of issuing one write per line.
+    fh = logging.FileHandler(_LOG_PATH, mode="w", encoding="utf-8")
     fmt = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
     fh.setFormatter(fmt)
-    logger.addHandler(fh)
+    logger.addHandler(
+        logging.handlers.MemoryHandler(
+            64, flushLevel=logging.ERROR, target=fh, flushOnClose=True
+        )
+    )
+
+    # Optional: also echo to Blender console (set CIS_PM_LOG_ECHO=1)
+    if os.environ.get("CIS_PM_LOG_ECHO"):
+        ch = logging.StreamHandler()
+        ch.setFormatter(fmt)
+        logger.addHandler(ch)
+
+    logger.debug("Logger initialized, writing to %s", _LOG_PATH)
+    return logger
 
-    # Optional: also echo to Blender console
-    ch = logging.StreamHandler()
-    ch.setFormatter(fmt)
-    logger.addHandler(ch)
 
-    logger.debug("Logger initialized, writing to %s", get_log_path())
-    return logger
+def flush_logger() -> None:
+    """Write any buffered records of the shared logger to the log file now."""
+    for handler in logging.getLogger(LOGGER_NAME).handlers:
+        try:
+            handler.flush()
+        except Exception:
+            pass  # never let a flush failure break the caller
+
+
+def invalidate_log_cache() -> None:
+    """Force the next open_log_in_text_editor() call to re-read the log file."""
+    global _LAST_LOG_STAT
+    _LAST_LOG_STAT = None
 
 
 def log_exception(logger: logging.Logger, msg: str) -> None:
-    """Log an exception with traceback."""
-    tb = traceback.format_exc()
-    logger.error("%s\n%s", msg, tb)
+    """Log an exception with traceback (formatted lazily by the handler)."""
+    logger.error(msg, exc_info=True)
 
 
 def open_log_in_text_editor() -> None:
     """
     Load cis_pm_generator_log.txt into the Blender Text Editor.
 
-    - If a text with the same name exists, it is removed and reloaded from disk
-      so you always see the latest run.
+    - If a text with the same name exists, its content is refreshed in place from
+      disk (no remove/load round-trip), so you always see the latest run.
+    - No-op if the text block exists and the file is unchanged since the last open.
     """
+    global _LAST_LOG_STAT
     try:
         import bpy
     except ImportError:
         # Running outside Blender – nothing to do
         return
 
-    path = get_log_path()
-    name = os.path.basename(path)
+    path = _LOG_PATH
+    name = LOG_FILENAME
+
+    flush_logger()  # buffered records belong in the file we are about to show
+    try:
+        st = os.stat(path)
+        key = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        key = None
 
-    # Remove existing text block with same name to force reload
     existing = bpy.data.texts.get(name)
-    if existing is not None:
+    if existing is not None and key is not None and key == _LAST_LOG_STAT:
+        return  # nothing new since the last open
+    _LAST_LOG_STAT = key
+
+    # Reuse an existing text block: refresh its content in place instead of
+    # removing it (full datablock unlink + UI redraw) and loading it again
+    if existing is not None and key is not None:
         try:
-            bpy.data.texts.remove(existing)
-        except RuntimeError:
-            # If it's pinned or in use, just leave it
-            pass
+            with open(path, "r", encoding="utf-8", buffering=65536) as f:
+                existing.from_string(f.read())
+            return
+        except Exception:
+            try:
+                bpy.data.texts.remove(existing)
+            except RuntimeError:
+                # If it's pinned or in use, just leave it
+                pass
 
     if os.path.exists(path):
         try:
             bpy.data.texts.load(path)
         except Exception:
             # As a fallback, create an empty text and write a hint
+            _LAST_LOG_STAT = None
             txt = bpy.data.texts.new(name=name)
             txt.write("// Could not load log file from disk.\n")
             txt.write(f"// Expected path: {path}\n")
@@ -1,6 +1,8 @@
 import math
+from functools import lru_cache
 from pathlib import Path
 import os
+import shutil
 
 # ---------- Constants ----------
 
@@ -23,23 +25,30 @@ def parse_obj_by_object(obj_path):
       o Wing1
       g Wing1_Plane.001
     """
+    with open(obj_path, "r", encoding="utf-8", errors="ignore") as f:
+        return parse_obj_lines_by_object(f)
+
+
+def parse_obj_lines_by_object(lines):
+    """
+    Same as parse_obj_by_object(), but from in-memory OBJ lines.
+    """
     objects = {}
     current = None
-    with open(obj_path, "r", encoding="utf-8", errors="ignore") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-
-            # Start a new logical object on either 'o' or 'g'
-            if line.startswith("o ") or line.startswith("g "):
-                current = line.split(maxsplit=1)[1].strip()
-                objects[current] = []
-            elif line.startswith("v ") and current:
-                parts = line.split()
-                if len(parts) >= 4:
-                    _, xs, ys, zs = parts[:4]
-                    objects[current].append((float(xs), float(ys), float(zs)))
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        # Start a new logical object on either 'o' or 'g'
+        if line.startswith("o ") or line.startswith("g "):
+            current = line.split(maxsplit=1)[1].strip()
+            objects[current] = []
+        elif line.startswith("v ") and current:
+            parts = line.split()
+            if len(parts) >= 4:
+                _, xs, ys, zs = parts[:4]
+                objects[current].append((float(xs), float(ys), float(zs)))
     return objects
 
 
@@ -94,13 +103,13 @@ def section_chord_info(points, span_axis):
     else:
         raise ValueError("span_axis must be 'x' or 'y'")
 
-    unique = sorted(set(span_vals))
+    unique = np.unique(span_vals)  # sorted + deduplicated in one call
     if len(unique) < 2:
         raise ValueError("Not enough distinct spanwise positions to define root & tip.")
 
     # Root = closest to fuselage / origin, tip = farthest spanwise from root
-    root_val = min(unique, key=lambda v: abs(v))
-    tip_val = max(unique, key=lambda v: abs(v - root_val))
+    root_val = unique[np.argmin(np.abs(unique))]
+    tip_val = unique[np.argmax(np.abs(unique - root_val))]
 
     root_pts = pts[abs(span_vals - root_val) < 1e-6]
     tip_pts = pts[abs(span_vals - tip_val) < 1e-6]
@@ -158,7 +167,17 @@ def compute_all_panels(obj_path, wing_dihed_deg, log_func=print):
     wing_dihed_deg: dihedral (deg) to apply to Wing1 and Wing2.
     H-Stab stays 0 deg. Vert_Stab is 90 deg.
     """
-    objs = parse_obj_by_object(obj_path)
+    return _compute_panels(parse_obj_by_object(obj_path), wing_dihed_deg, log_func)
+
+
+def compute_all_panels_from_lines(lines, wing_dihed_deg, log_func=print):
+    """
+    Same as compute_all_panels(), but from in-memory OBJ lines.
+    """
+    return _compute_panels(parse_obj_lines_by_object(lines), wing_dihed_deg, log_func)
+
+
+def _compute_panels(objs, wing_dihed_deg, log_func):
 
     # For debug visibility
     log_func("Found objects: " + ", ".join(sorted(objs.keys())))
@@ -198,6 +217,11 @@ def compute_all_panels(obj_path, wing_dihed_deg, log_func=print):
 
 # ---------- Template-based wing block builder & ACF rewrite ----------
 
+@lru_cache(maxsize=4)
+def _load_template_lines(template_path, mtime):
+    return tuple(Path(template_path).read_text(encoding="utf-8", errors="ignore").splitlines())
+
+
 def build_wing_blocks_from_template(panel_data, template_path=WING_TEMPLATE_PATH, log_func=print):
     """
     Build full P _wing/n blocks for all wings using a zeroed template.
@@ -210,8 +234,8 @@ def build_wing_blocks_from_template(panel_data, template_path=WING_TEMPLATE_PATH
 
     Returns: list of strings (without trailing newlines).
     """
-    template_text = Path(template_path).read_text(encoding="utf-8", errors="ignore")
-    template_lines = template_text.splitlines()
+    # Cached per (path, mtime): only re-read after the template file changes
+    template_lines = _load_template_lines(str(template_path), os.path.getmtime(template_path))
 
     mapping = {
         "Wing1": [0, 1],
@@ -357,6 +381,30 @@ def build_wing_blocks_from_template(panel_data, template_path=WING_TEMPLATE_PATH
     return all_lines
 
 
+def _write_acf_lines(acf_out_path, lines):
+    """
+    Write lines to acf_out_path via a temp file next to it + os.replace, so
+    a failed write never leaves a truncated .acf behind (and never a .tmp).
+    An existing acf_out_path must be writable; its mode bits are kept.
+    """
+    out_exists = os.path.exists(acf_out_path)
+    if out_exists and not os.access(acf_out_path, os.W_OK):
+        raise PermissionError(f"ACF is not writable: {acf_out_path}")
+    tmp_path = f"{acf_out_path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+        if out_exists:
+            shutil.copymode(acf_out_path, tmp_path)
+        os.replace(tmp_path, acf_out_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
 def rewrite_acf_wings(acf_in_path, acf_out_path, new_wing_lines):
     """
     Strip existing P _wing/... lines inside PROPERTIES block and insert
@@ -378,8 +426,7 @@ def rewrite_acf_wings(acf_in_path, acf_out_path, new_wing_lines):
     if prop_begin is None or prop_end is None or prop_end <= prop_begin:
         # Fallback: append at end
         new = lines + list(new_wing_lines)
-        with open(acf_out_path, "w", encoding="utf-8") as f:
-            f.write("\n".join(new))
+        _write_acf_lines(acf_out_path, new)
         return
 
     wing_start = None
@@ -399,8 +446,7 @@ def rewrite_acf_wings(acf_in_path, acf_out_path, new_wing_lines):
     new_lines.extend(new_wing_lines)
     new_lines.extend(lines[wing_end + 1:])
 
-    with open(acf_out_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(new_lines))
+    _write_acf_lines(acf_out_path, new_lines)
 
 
 def generate_wings_from_template_and_rewrite_acf(acf_path, panel_data, template_path, log_func=print):
@@ -9,6 +9,8 @@ import os
 import shutil
 from typing import Iterable, List, Optional, Tuple
 
+import numpy as np
+
 try:
     import bpy
 except ImportError:  # allow static analysis outside Blender
@@ -18,16 +20,20 @@ except ImportError:  # allow static analysis outside Blender
 # ----------------------------
 # Paths
 # ----------------------------
+_ADDON_ROOT = os.path.dirname(os.path.abspath(__file__))
+_VMESH_DIR = os.path.join(_ADDON_ROOT, "vmesh")
+_DEFAULT_DUMP_PATH = os.path.join(_VMESH_DIR, "virtual_obj_dump.txt")
+
 def _addon_root() -> str:
-    return os.path.dirname(os.path.abspath(__file__))
+    return _ADDON_ROOT
 
 def _vmesh_dir() -> str:
-    d = os.path.join(_addon_root(), "vmesh")
-    os.makedirs(d, exist_ok=True)
-    return d
+    os.makedirs(_VMESH_DIR, exist_ok=True)
+    return _VMESH_DIR
 
 def default_dump_path() -> str:
-    return os.path.join(_vmesh_dir(), "virtual_obj_dump.txt")
+    _vmesh_dir()  # ensure the folder exists
+    return _DEFAULT_DUMP_PATH
 
 
 
@@ -38,21 +44,12 @@ def _iter_visible_mesh_objects_recursive(collection: "bpy.types.Collection") ->
     """
     Yield mesh objects that are visible in the viewport within `collection` and subcollections.
     WHY: Only visible elements are part of the flight model dataset.
+    `all_objects` is already de-duplicated across linked subcollections, and
+    the cheap type check runs before visible_get().
     """
-    yielded = set()
-
-    for obj in collection.objects:
+    for obj in collection.all_objects:
         if obj.type == "MESH" and obj.visible_get():
-            if obj.name_full not in yielded:
-                yielded.add(obj.name_full)
-                yield obj
-
-    for child in collection.children_recursive:
-        for obj in child.objects:
-            if obj.type == "MESH" and obj.visible_get():
-                if obj.name_full not in yielded:
-                    yielded.add(obj.name_full)
-                    yield obj
+            yield obj
 
 
 # ----------------------------
@@ -61,7 +58,8 @@ def _iter_visible_mesh_objects_recursive(collection: "bpy.types.Collection") ->
 def _axis_remap_blender_to_target(xb: float, yb: float, zb: float) -> Tuple[float, float, float]:
     """
     Blender: -Y forward, Z up  → Target: -Z forward, Y up
-    Match reference orientation:
+    Scalar reference; build_virtual_obj_lines applies the same mapping to
+    whole vertex arrays. Match reference orientation:
       Xt = Xb
       Yt = Zb
       Zt = -Yb
@@ -72,15 +70,42 @@ def _axis_remap_blender_to_target(xb: float, yb: float, zb: float) -> Tuple[floa
 # ----------------------------
 # Mesh evaluation
 # ----------------------------
-def _eval_mesh_world(obj: "bpy.types.Object", depsgraph: "bpy.types.Depsgraph") -> "bpy.types.Mesh":
+def _needs_eval(obj: "bpy.types.Object") -> bool:
     """
-    Apply modifiers and bake world transform into a temporary Mesh.
-    WHY: Downstream expects world-space geometry consistent with OBJ output.
+    True if the evaluated geometry can differ from obj.data: modifiers, shape
+    keys, or unsynced Edit Mode changes. Otherwise obj.data is read directly.
+    """
+    return bool(obj.modifiers) or obj.data.shape_keys is not None or obj.mode == "EDIT"
+
+
+def _eval_mesh(obj: "bpy.types.Object", depsgraph: "bpy.types.Depsgraph") -> "bpy.types.Mesh":
+    """
+    Apply modifiers into a temporary Mesh (object space).
+    WHY: The world transform is applied to the whole vertex array at once in
+    build_virtual_obj_lines, instead of transforming the temporary Mesh.
+    Caller releases it with obj.to_mesh_clear().
     """
     ob_eval = obj.evaluated_get(depsgraph)
-    mesh = ob_eval.to_mesh(preserve_all_data_layers=False, depsgraph=depsgraph)
-    mesh.transform(obj.matrix_world)
-    return mesh
+    return ob_eval.to_mesh(preserve_all_data_layers=False, depsgraph=depsgraph)
+
+
+def _world_coords(co: np.ndarray, matrix_world) -> np.ndarray:
+    """
+    Transform an (N,3) array of object-space coords to world space in one matmul.
+    """
+    m = np.asarray(matrix_world, dtype=np.float64)
+    return co @ m[:3, :3].T + m[:3, 3]
+
+
+def _scratch_view(scratch: dict, key: str, n: int, dtype) -> np.ndarray:
+    """
+    Return a length-n view of a reusable flat buffer, growing it only when a
+    mesh needs more room than any previous one (foreach_get accepts views).
+    """
+    buf = scratch.get(key)
+    if buf is None or buf.size < n:
+        buf = scratch[key] = np.empty(max(n, 2 * (0 if buf is None else buf.size)), dtype=dtype)
+    return buf[:n]
 
 
 # ----------------------------
@@ -91,6 +116,7 @@ def build_virtual_obj_lines(
     selected_collection: "bpy.types.Collection",
     *,
     sort_by_name: bool = False,  # preserve collection traversal order by default
+    objects: Optional[Iterable["bpy.types.Object"]] = None,
 ) -> List[str]:
     """
     Build an in-memory OBJ dataset (list of text lines) with this structure:
@@ -99,16 +125,21 @@ def build_virtual_obj_lines(
       ...
       f i j k ...
     for each visible mesh (recursive) in `selected_collection`, with:
-      - Modifiers applied, world transform baked.
+      - Modifiers applied, world transform baked (one NumPy matmul per mesh).
       - Axis remap: (-Y fwd, Z up) → (-Z fwd, Y up) via Xt=Xb, Yt=Zb, Zt=-Yb.
       - Polygon faces preserved (no triangulation).
       - Global 1-based vertex indexing across objects.
+
+    If `objects` is given (already-filtered visible meshes), the collection
+    walk is skipped and those objects are exported in the given order.
     """
     if bpy is None:
         raise RuntimeError("pm_adapter must be executed inside Blender.")
 
     dg = context.evaluated_depsgraph_get()
-    objs = list(_iter_visible_mesh_objects_recursive(selected_collection))
+    if objects is None:
+        objects = _iter_visible_mesh_objects_recursive(selected_collection)
+    objs = list(objects)
     if sort_by_name:
         objs.sort(key=lambda o: o.name)
 
@@ -116,28 +147,45 @@ def build_virtual_obj_lines(
     lines.append("# virtual OBJ generated by pm_adapter (Blender 4.5+)\n")
 
     global_vertex_count = 0  # 0-based counter used to compute OBJ 1-based indices
+    scratch: dict = {}  # foreach_get buffers shared by all meshes of this export
 
     for obj in objs:
-        mesh = _eval_mesh_world(obj, dg)
+        # Plain meshes: read obj.data as-is, no temporary copy
+        evaluated = _needs_eval(obj)
+        mesh = _eval_mesh(obj, dg) if evaluated else obj.data
         try:
             # Object header first (so dataset matches reference layout)
             lines.append(f"o {obj.name}\n")
 
-            # Emit vertices (axis remapped)
+            # Emit vertices (axis remapped), read in bulk via foreach_get
             start_index = global_vertex_count
-            for v in mesh.vertices:
-                xt, yt, zt = _axis_remap_blender_to_target(v.co.x, v.co.y, v.co.z)
-                lines.append(f"v {xt:.6f} {yt:.6f} {zt:.6f}\n")
-            global_vertex_count += len(mesh.vertices)
+            n_verts = len(mesh.vertices)
+            co = _scratch_view(scratch, "co", n_verts * 3, np.float32)
+            mesh.vertices.foreach_get("co", co)
+            co = _world_coords(co.reshape(n_verts, 3), obj.matrix_world)
+            # Xt = Xb, Yt = Zb, Zt = -Yb (see _axis_remap_blender_to_target):
+            # column permutation + in-place sign flip on the whole array
+            remapped = co[:, [0, 2, 1]]
+            remapped[:, 2] *= -1.0
+            lines.extend("v %.6f %.6f %.6f\n" % tuple(row) for row in remapped.tolist())
+            global_vertex_count += n_verts
 
             # Emit polygon faces (variable-length), 1-based global indices
-            for poly in mesh.polygons:
-                idxs = [start_index + vi + 1 for vi in poly.vertices]
-                lines.append("f " + " ".join(str(i) for i in idxs) + "\n")
+            n_polys = len(mesh.polygons)
+            loop_vi = _scratch_view(scratch, "loop_vi", len(mesh.loops), np.int32)
+            loop_start = _scratch_view(scratch, "loop_start", n_polys, np.int32)
+            loop_total = _scratch_view(scratch, "loop_total", n_polys, np.int32)
+            mesh.loops.foreach_get("vertex_index", loop_vi)
+            mesh.polygons.foreach_get("loop_start", loop_start)
+            mesh.polygons.foreach_get("loop_total", loop_total)
+            idx_str = [str(i) for i in (loop_vi.astype(np.int64) + (start_index + 1)).tolist()]
+            for ls, lt in zip(loop_start.tolist(), loop_total.tolist()):
+                lines.append("f " + " ".join(idx_str[ls:ls + lt]) + "\n")
 
         finally:
             # Release evaluated mesh
-            obj.to_mesh_clear()
+            if evaluated:
+                obj.to_mesh_clear()
 
     return lines
 
@@ -176,8 +224,8 @@ def run_bodies_from_collection(
     # Dump to file for verification
     dump_path = dump_path or default_dump_path()
     try:
-        with open(dump_path, "w", encoding="utf-8") as f:
-            f.writelines(lines)
+        with open(dump_path, "wb") as f:
+            f.write("".join(lines).encode("utf-8"))
         logger(f"[CIS_PM] Virtual OBJ dumped: {dump_path}")
         logger(f"[CIS_PM] Dump size: {len(lines)} line(s)")
     except Exception as e:
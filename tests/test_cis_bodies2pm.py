@@ -0,0 +1,30 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "addons", "cis_pm_addon"))
+
+import cis_bodies2pm  # noqa: E402  (imported without the bpy-only package __init__)
+
+
+def _virtual_obj(object_name):
+    # Same layout pm_adapter.build_virtual_obj_lines emits for one object
+    return [
+        "# virtual OBJ generated by pm_adapter (Blender 4.5+)\n",
+        f"o {object_name}\n",
+        "v 0.000000 0.000000 0.000000\n",
+        "v 1.000000 0.000000 0.000000\n",
+        "v 0.000000 1.000000 0.000000\n",
+        "f 1 2 3\n",
+    ]
+
+
+def test_object_name_with_surrounding_whitespace_matches_group_name():
+    object_name = "  Fuselage "
+    lines = _virtual_obj(object_name)
+
+    groups = cis_bodies2pm.load_all_groups_with_faces_from_lines(lines)
+    name = cis_bodies2pm.obj_group_name(object_name)
+
+    assert name == "Fuselage"
+    assert list(groups) == [name]
+    assert cis_bodies2pm.scan_obj_mesh_names_from_lines(lines) == [name]